@@ -18,11 +18,30 @@ Usage:
 import argparse
 import csv
 import difflib
+import hashlib
+import os
 import re
 import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import pdfplumber
+# pypdf extrahiert reinen Text deutlich schneller als pdfplumber; mehr als
+# extract_text braucht dieses Skript nicht. pdfplumber bleibt als Fallback.
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
 
 MONTHS_RE = re.compile(
     r"\b(?:Jan(?:uar)?|Feb(?:ruar)?|M(?:ärz?|aerz?|rz|ar)|Apr(?:il)?|Mai|Jun(?:i)?|"
@@ -30,15 +49,14 @@ MONTHS_RE = re.compile(
     r"\s*(?:[/\.\-]\s*|\s+)\d{2,4}\b"
 )
 DE_NUMBER_RE = re.compile(r"-?\d{1,3}(?:\.\d{3})*,\d{2}|-?0,00")
-ENTWICKLUNGSUEBERSICHT_TERMS = (
-    "entwicklungsübersicht",
-    "entwicklungsuebersicht",
-    "jahresübersicht",
-    "jahresuebersicht",
+# Ein kombinierter Scan in C statt mehrerer substring-Pruefungen pro Seite;
+# IGNORECASE ersetzt das casefold() des Seitentexts.
+ENTWICKLUNGSUEBERSICHT_RE = re.compile(
+    r"(?:entwicklungs|jahres)(?:ü|ue)bersicht", re.IGNORECASE
 )
 SEPARATOR_CLEAN_RE = re.compile(r"\s*([/.\-])\s*")
 
-SECTION_BREAK_AFTER = {
+SECTION_BREAK_AFTER = frozenset({
     "Aktivierte Eigenleistungen",
     "Gesamtleistung",
     "Material-/Wareneinkauf",
@@ -53,8 +71,8 @@ SECTION_BREAK_AFTER = {
     "Ergebnis vor Steuern",
     "Steuern Einkommen u. Ertrag",
     "Vorläufiges Ergebnis",
-}
-COST_LABELS = {
+})
+COST_LABELS = frozenset({
     "Personalkosten",
     "Raumkosten",
     "Betriebliche Steuern",
@@ -67,11 +85,14 @@ COST_LABELS = {
     "Reparatur/Instandhaltung",
     "Sonstige Kosten",
     "Gesamtkosten",
-}
+})
 
 
 HEADER_FILL = "D9D9D9"
 MIN_MONTH_COLUMNS = 4
+# In den Inhalts-Hash eingerechnet; bei Aenderungen an der Extraktionslogik
+# hochzaehlen, damit vorhandene Ausgaben neu erzeugt werden.
+CACHE_VERSION = "1"
 STRUCTURE_MATCH_THRESHOLD = 0.86
 DEFAULT_STRUCTURE_FILES = (
     "DATEV_BWA_Struktur_Vorlage.csv",
@@ -183,20 +204,37 @@ def normalize_label(text: str) -> str:
 
 def parse_rows_from_text(text: str, months):
     rows = []
-    for raw_line in text.splitlines():
+    seen = set()
+    len_months = len(months)
+    empty_row = [""] * len_months
+    # Ein finditer-Lauf ueber den ganzen Seitentext statt eines Regex-Starts
+    # pro Zeile; die Treffer werden ueber die Zeilenanfaenge zugeordnet.
+    lines = text.split("\n")
+    line_starts = [m.start() for m in re.finditer(r"^", text, re.MULTILINE)]
+    matches_by_line = [[] for _ in line_starts]
+    for match in DE_NUMBER_RE.finditer(text):
+        matches_by_line[bisect_right(line_starts, match.start()) - 1].append(match)
+    for raw_line, line_start, matches in zip(lines, line_starts, matches_by_line):
         line = raw_line.strip()
         if not line:
             continue
         if line == "Kostenarten:":
-            rows.append((line, [""] * len(months)))
+            if line not in seen:
+                seen.add(line)
+                rows.append((line, empty_row))
             continue
-        nums = DE_NUMBER_RE.findall(line)
-        if len(nums) >= len(months):
-            values = nums[-len(months):]
-            first_num = values[0]
-            pos = line.find(first_num)
-            label = line[:pos].strip()
-            rows.append((label, values))
+        if len(matches) >= len_months:
+            # Die Treffer-Position liefert die Labelgrenze direkt, ohne die
+            # Zeile per str.find erneut zu durchsuchen.
+            first = matches[-len_months]
+            values = [m.group(0) for m in matches[-len_months:]]
+            label = raw_line[: first.start() - line_start].strip()
+            # Dedup direkt beim Einsammeln; spart den zweiten Durchlauf
+            # ueber alle Zeilen in convert_page_to_csv.
+            key = (label, tuple(values))
+            if key not in seen:
+                seen.add(key)
+                rows.append((label, values))
     return rows
 
 
@@ -308,11 +346,12 @@ def align_rows_to_structure(structure_template, extracted_rows, months_count):
 
 def write_csv_table(columns, rows, out_path: Path):
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f, delimiter=";")
-        writer.writerow(columns)
-        for row in rows:
-            writer.writerow(row)
+    # Die Felder sind kontrolliert (keine Semikolons, kein Quoting noetig),
+    # daher reicht ein str.join pro Zeile statt csv.writer pro Feld.
+    lines = [";".join(columns)]
+    lines.extend(";".join(row) for row in rows)
+    with out_path.open("wb") as f:
+        f.write(("\r\n".join(lines) + "\r\n").encode("utf-8-sig"))
 
 
 def format_excel_sheet(ws, columns, numeric_columns, text_columns):
@@ -352,23 +391,82 @@ def format_excel_sheet(ws, columns, numeric_columns, text_columns):
         ws.column_dimensions[get_column_letter(col_idx)].width = width
 
 
-def write_excel_table(columns, rows, out_path: Path):
-    try:
-        import pandas as pd
-    except ImportError as exc:
-        raise RuntimeError("Pandas ist nicht installiert. Excel-Ausgabe nicht moeglich.") from exc
+def write_excel_stream(columns, data_rows, numeric_columns, text_columns, out_path: Path):
+    import xlsxwriter
+
+    # constant_memory streamt jede Zeile direkt auf die Platte (O(1) RAM),
+    # daher werden die Spaltenbreiten vorab aus den Daten bestimmt.
+    widths = [len(str(col)) for col in columns]
+    for row in data_rows:
+        for idx, value in enumerate(row):
+            if isinstance(value, (int, float)):
+                display = f"{value:,.2f}"
+            else:
+                display = "" if value is None else str(value)
+            if display and len(display) > widths[idx]:
+                widths[idx] = len(display)
 
+    wb = xlsxwriter.Workbook(str(out_path), {"constant_memory": True})
     try:
-        import openpyxl  # noqa: F401
-    except ImportError as exc:
-        raise RuntimeError("openpyxl ist nicht installiert. Excel-Ausgabe nicht moeglich.") from exc
+        ws = wb.add_worksheet("Daten")
+        header_format = wb.add_format(
+            {
+                "bold": True,
+                "bg_color": f"#{HEADER_FILL}",
+                "align": "center",
+                "valign": "vcenter",
+                "text_wrap": True,
+            }
+        )
+        number_format = wb.add_format({"num_format": "#,##0.00", "align": "right"})
+        text_format = wb.add_format({"align": "left"})
+        for col_idx, col_name in enumerate(columns):
+            max_width = 60 if col_name in text_columns else 24
+            width = min(widths[col_idx] + 2, max_width)
+            width = max(width, 8)
+            ws.set_column(col_idx, col_idx, width)
+        ws.write_row(0, 0, columns, header_format)
+        for row_idx, row in enumerate(data_rows, start=1):
+            for col_idx, value in enumerate(row):
+                if columns[col_idx] in numeric_columns and isinstance(value, (int, float)):
+                    ws.write_number(row_idx, col_idx, value, number_format)
+                else:
+                    ws.write(row_idx, col_idx, "" if value is None else value, text_format)
+        ws.freeze_panes(1, 0)
+        ws.autofilter(0, 0, len(data_rows), len(columns) - 1)
+    finally:
+        wb.close()
 
+
+def write_excel_table(columns, rows, out_path: Path):
     out_path.parent.mkdir(parents=True, exist_ok=True)
     excel_rows = []
     for row in rows:
         label = row[0]
         values = [parse_de_amount(value) for value in row[1:]]
         excel_rows.append([label] + values)
+
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        xlsxwriter = None
+
+    if xlsxwriter is not None:
+        try:
+            write_excel_stream(columns, excel_rows, set(columns[1:]), {"Bezeichnung"}, out_path)
+        except Exception as exc:
+            raise RuntimeError(f"Excel-Ausgabe fehlgeschlagen: {exc}") from exc
+        return
+
+    # Fallback ohne xlsxwriter: pandas + openpyxl (puffert das ganze Blatt).
+    if pd is None:
+        raise RuntimeError("Pandas ist nicht installiert. Excel-Ausgabe nicht moeglich.")
+
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError("openpyxl ist nicht installiert. Excel-Ausgabe nicht moeglich.") from exc
+
     df = pd.DataFrame(excel_rows, columns=columns)
     with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
         df.to_excel(writer, index=False, sheet_name="Daten")
@@ -376,15 +474,70 @@ def write_excel_table(columns, rows, out_path: Path):
         format_excel_sheet(ws, columns, columns[1:], {"Bezeichnung"})
 
 
-def find_entwicklungsuebersicht_page(pdf):
-    for index, page in enumerate(pdf.pages, start=1):
-        page_text = page.extract_text() or ""
-        lowered = page_text.casefold()
-        if any(term in lowered for term in ENTWICKLUNGSUEBERSICHT_TERMS):
+def iter_page_texts(pdf_path: Path):
+    """Liefert die Seitentexte lazy, mit pypdf wenn vorhanden."""
+    if PdfReader is not None:
+        reader = PdfReader(pdf_path)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+    if pdfplumber is None:
+        raise RuntimeError("Weder pypdf noch pdfplumber ist installiert.")
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text() or ""
+            # Seiten-Cache sofort freigeben, sonst waechst der RAM mit der Seitenzahl.
+            page.flush_cache()
+            yield page_text
+
+
+def find_entwicklungsuebersicht_page(pdf_path: Path):
+    if PdfReader is None and pdfplumber is not None:
+        # pdfplumber-Pfad: Der Berichtskopf steht im oberen Seitenbereich,
+        # daher reicht fuer die Suche das obere Fuenftel; nur die Trefferseite
+        # wird komplett extrahiert.
+        with pdfplumber.open(pdf_path) as pdf:
+            for index, page in enumerate(pdf.pages, start=1):
+                header_region = page.crop((0, 0, page.width, page.height * 0.2))
+                header_text = header_region.extract_text() or ""
+                if ENTWICKLUNGSUEBERSICHT_RE.search(header_text):
+                    page_text = page.extract_text() or ""
+                    page.flush_cache()
+                    return index, page_text
+                page.flush_cache()
+        return None, ""
+    for index, page_text in enumerate(iter_page_texts(pdf_path), start=1):
+        if ENTWICKLUNGSUEBERSICHT_RE.search(page_text):
             return index, page_text
     return None, ""
 
 
+def locate_page_text(pdf_path: Path, page_number: int | None):
+    """Liefert (Seitennummer, Seitentext) mit genau einem extract_text pro Seite.
+
+    Ohne Seitenangabe wird die Suche genutzt und deren Text direkt
+    uebernommen, statt die Trefferseite erneut zu extrahieren.
+    """
+    if page_number is None:
+        page_number, page_text = find_entwicklungsuebersicht_page(pdf_path)
+        if page_number is None:
+            raise RuntimeError("Keine Seite mit 'Entwicklungsuebersicht' in der PDF gefunden.")
+        return page_number, page_text
+    if page_number < 1:
+        raise ValueError("page_number muss 1-basiert sein")
+    if PdfReader is not None:
+        pages = PdfReader(pdf_path).pages
+        if page_number > len(pages):
+            raise ValueError(f"PDF hat nur {len(pages)} Seiten, angefragt wurde {page_number}.")
+        return page_number, pages[page_number - 1].extract_text() or ""
+    if pdfplumber is None:
+        raise RuntimeError("Weder pypdf noch pdfplumber ist installiert.")
+    with pdfplumber.open(pdf_path) as pdf:
+        if page_number > len(pdf.pages):
+            raise ValueError(f"PDF hat nur {len(pdf.pages)} Seiten, angefragt wurde {page_number}.")
+        return page_number, pdf.pages[page_number - 1].extract_text() or ""
+
+
 def convert_page_to_csv(
     pdf_path: Path,
     page_number: int | None,
@@ -393,17 +546,7 @@ def convert_page_to_csv(
     write_excel_file: bool = False,
     excel_path: Path | None = None,
 ):
-    with pdfplumber.open(pdf_path) as pdf:
-        if page_number is None:
-            page_number, page_text = find_entwicklungsuebersicht_page(pdf)
-            if page_number is None:
-                raise RuntimeError("Keine Seite mit 'Entwicklungsuebersicht' in der PDF gefunden.")
-        else:
-            if page_number < 1:
-                raise ValueError("page_number muss 1-basiert sein")
-            if page_number > len(pdf.pages):
-                raise ValueError(f"PDF hat nur {len(pdf.pages)} Seiten, angefragt wurde {page_number}.")
-            page_text = pdf.pages[page_number - 1].extract_text() or ""
+    page_number, page_text = locate_page_text(pdf_path, page_number)
 
     header = detect_month_header(page_text)
     if not header:
@@ -412,14 +555,6 @@ def convert_page_to_csv(
     rows = parse_rows_from_text(page_text, header)
     rows = ensure_kostenarten(rows, header)
 
-    seen = set()
-    uniq_rows = []
-    for label, values in rows:
-        key = (label, tuple(values))
-        if key not in seen:
-            seen.add(key)
-            uniq_rows.append((label, values))
-
     structure_template = structure_numbers
     if structure_template is None:
         default_structure = pick_default_structure_path(Path(__file__).resolve().parent)
@@ -427,9 +562,9 @@ def convert_page_to_csv(
             structure_template = load_structure_template(default_structure)
 
     if structure_template is not None:
-        final_rows = align_rows_to_structure(structure_template, uniq_rows, len(header))
+        final_rows = align_rows_to_structure(structure_template, rows, len(header))
     else:
-        final_rows = compress_blank_rows(insert_section_breaks(uniq_rows, len(header)))
+        final_rows = compress_blank_rows(insert_section_breaks(rows, len(header)))
 
     columns, rows = build_output_table(header, final_rows, structure_template)
     write_csv_table(columns, rows, out_path)
@@ -440,6 +575,12 @@ def convert_page_to_csv(
     return out_path
 
 
+def content_fingerprint(pdf_path: Path) -> str:
+    # BLAKE2b liest mit ~1 GB/s; deutlich billiger, als die PDF neu zu parsen.
+    digest = hashlib.blake2b(pdf_path.read_bytes(), digest_size=16).hexdigest()
+    return f"{CACHE_VERSION}:{digest}"
+
+
 def build_output_paths(out_dir: Path, pdf_path: Path, excel_dir: Path | None, write_excel_file: bool):
     csv_path = out_dir / f"{pdf_path.stem}_jahresentwicklung.csv"
     excel_path = None
@@ -472,6 +613,36 @@ def load_structure_template(structure_path: Path):
     return labels
 
 
+def _init_worker():
+    # Laedt die Excel-Abhaengigkeiten einmal pro Worker-Prozess vor, damit
+    # der Importpreis nicht erst beim ersten konvertierten PDF anfaellt.
+    for module in ("xlsxwriter", "openpyxl"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _process_one(
+    pdf_path: Path,
+    page_number: int | None,
+    out_path: Path,
+    structure_numbers: list[str] | None,
+    write_excel_file: bool,
+    excel_path: Path | None,
+):
+    # Top-level Worker, damit ProcessPoolExecutor ihn picklen kann.
+    convert_page_to_csv(
+        pdf_path,
+        page_number,
+        out_path,
+        structure_numbers,
+        write_excel_file,
+        excel_path,
+    )
+    return out_path
+
+
 def convert_batch(
     input_dir: Path,
     out_dir: Path,
@@ -489,27 +660,57 @@ def convert_batch(
         excel_dir.mkdir(parents=True, exist_ok=True)
     written = []
     skipped = []
+    jobs = []
     for pdf_path in pdf_paths:
         out_path, excel_path = build_output_paths(out_dir, pdf_path, excel_dir, write_excel_file)
-        if out_path.exists() and (not write_excel_file or (excel_path and excel_path.exists())):
-            safe_print(f"INFO: Uebersprungen (bereits vorhanden): {out_path}")
-            continue
+        hash_path = out_path.with_name(out_path.name + ".hash")
         try:
-            convert_page_to_csv(
+            fingerprint = content_fingerprint(pdf_path)
+            outputs_exist = out_path.exists() and (
+                not write_excel_file or (excel_path and excel_path.exists())
+            )
+            if outputs_exist:
+                # Ohne Sidecar wird wie bisher uebersprungen; bei abweichendem
+                # Inhalts-Hash wird die PDF neu konvertiert.
+                stored = (
+                    hash_path.read_text(encoding="ascii").strip() if hash_path.exists() else None
+                )
+                if stored is None or stored == fingerprint:
+                    safe_print(f"INFO: Uebersprungen (bereits vorhanden): {out_path}")
+                    continue
+        except Exception as exc:
+            # Fehler pro Datei isolieren, damit der Batch weiterlaeuft.
+            skipped.append((pdf_path, str(exc)))
+            safe_print(f"Uebersprungen: {pdf_path} ({exc})")
+            continue
+        jobs.append((pdf_path, out_path, excel_path, fingerprint, hash_path))
+
+    # Jede PDF ist ein unabhaengiger CPU-Job; Prozesse skalieren nahezu linear.
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(
+                _process_one,
                 pdf_path,
                 page_number,
                 out_path,
                 structure_numbers,
                 write_excel_file,
                 excel_path,
-            )
-            written.append(out_path)
-            safe_print(f"Geschrieben: {out_path}")
-            if write_excel_file and excel_path is not None:
-                safe_print(f"Geschrieben: {excel_path}")
-        except Exception as exc:
-            skipped.append((pdf_path, str(exc)))
-            safe_print(f"Uebersprungen: {pdf_path} ({exc})")
+            ): (pdf_path, out_path, excel_path, fingerprint, hash_path)
+            for pdf_path, out_path, excel_path, fingerprint, hash_path in jobs
+        }
+        for future in as_completed(futures):
+            pdf_path, out_path, excel_path, fingerprint, hash_path = futures[future]
+            try:
+                future.result()
+                hash_path.write_text(fingerprint, encoding="ascii")
+                written.append(out_path)
+                safe_print(f"Geschrieben: {out_path}")
+                if write_excel_file and excel_path is not None:
+                    safe_print(f"Geschrieben: {excel_path}")
+            except Exception as exc:
+                skipped.append((pdf_path, str(exc)))
+                safe_print(f"Uebersprungen: {pdf_path} ({exc})")
     return written, skipped
 
 
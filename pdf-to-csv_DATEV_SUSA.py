@@ -14,13 +14,28 @@ Defaults:
 - Ohne Parameter laeuft ein Batch von input nach output.
 """
 import argparse
-import csv
+import hashlib
+import os
 import re
 import sys
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 import pdfplumber
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
 # Column slices based on measured x positions in the sample SuSa PDF.
 # Adjust here if the layout moves in other reports.
 COLUMN_BOUNDS = [
@@ -35,26 +50,63 @@ COLUMN_BOUNDS = [
 ]
 HEADER_FILL = "D9D9D9"
 SUSA_HEADER_RE = re.compile(r"summen\s*(?:-\s*)?und\s*salden", re.IGNORECASE)
+# In den Inhalts-Hash eingerechnet; bei Aenderungen an der Extraktionslogik
+# hochzaehlen, damit vorhandene Ausgaben neu erzeugt werden.
+CACHE_VERSION = "1"
 
 
 def collect_lines(page, bucket=1):
-    lines = {}
-    for ch in page.chars:
-        y = round(ch["top"] / bucket) * bucket
-        lines.setdefault(y, []).append(ch)
-    return [(y, lines[y]) for y in sorted(lines.keys())]
+    """Gruppiert die Chars einer Seite zu Zeilen, bereits nach x0 sortiert.
+
+    Ein Sortierlauf ueber (Zeilen-Bucket, x0) fuer die ganze Seite ersetzt
+    das Nachsortieren jeder einzelnen Zeile in slice_columns.
+    """
+    chars = page.chars
+    if np is not None and chars:
+        # Gruppierung ueber sort+unique statt N Dict-Einfuegungen in Python.
+        tops = np.fromiter((ch["top"] for ch in chars), dtype=np.float64, count=len(chars))
+        xs = np.fromiter((ch["x0"] for ch in chars), dtype=np.float64, count=len(chars))
+        keys = (np.round(tops / bucket) * bucket).astype(np.int64)
+        order = np.lexsort((xs, keys))
+        sorted_keys = keys[order]
+        _, starts = np.unique(sorted_keys, return_index=True)
+        bounds = list(starts) + [len(chars)]
+        return [
+            (int(sorted_keys[i0]), [chars[j] for j in order[i0:i1]])
+            for i0, i1 in zip(bounds, bounds[1:])
+        ]
+    decorated = [
+        (round(ch["top"] / bucket) * bucket, ch["x0"], idx)
+        for idx, ch in enumerate(chars)
+    ]
+    decorated.sort()
+    return [
+        (y, [chars[idx] for _, _, idx in group])
+        for y, group in groupby(decorated, key=itemgetter(0))
+    ]
 
 
 def slice_columns(chars):
-    chars = sorted(chars, key=lambda c: c["x0"])
+    # Erwartet nach x0 sortierte Chars (liefert collect_lines).
+    # Einmalige Parallel-Listen statt acht voller Scans ueber alle Chars:
+    # die Spaltengrenzen werden per bisect in der sortierten x0-Liste gefunden.
+    xs = [ch["x0"] for ch in chars]
+    texts = [ch["text"] for ch in chars]
     columns = {}
     for name, start, end in COLUMN_BOUNDS:
-        columns[name] = "".join(
-            ch["text"] for ch in chars if start <= ch["x0"] < end
-        ).strip()
+        i0 = bisect_left(xs, start)
+        i1 = bisect_left(xs, end)
+        columns[name] = "".join(texts[i0:i1]).strip()
     return columns
 
 
+# Entfernt Tausenderpunkte und macht das Komma zum Dezimalpunkt in einem
+# C-Durchlauf statt zweier .replace()-Zwischenstrings.
+_DECIMAL_TRANS = str.maketrans({".": None, ",": "."})
+# Gegenrichtung fuer die Ausgabe: Dezimalpunkt -> Komma ohne Zwischenstring.
+_DOT_TO_COMMA = str.maketrans({".": ","})
+
+
 def parse_amount(text, signed=False):
     if not text:
         return 0.0
@@ -64,9 +116,8 @@ def parse_amount(text, signed=False):
         if signed:
             sign = -1 if cleaned.endswith("H") else 1
         cleaned = cleaned[:-1]
-    cleaned = cleaned.replace(".", "").replace(",", ".")
     try:
-        return sign * float(cleaned)
+        return sign * float(cleaned.translate(_DECIMAL_TRANS))
     except ValueError:
         return 0.0
 
@@ -85,9 +136,14 @@ def safe_print(message: str):
 def find_susa_page_range(pdf):
     matches = []
     for index, page in enumerate(pdf.pages, start=1):
-        page_text = page.extract_text() or ""
-        if SUSA_HEADER_RE.search(page_text):
+        # Der Berichtskopf steht im oberen Seitenbereich; nur dieses Fuenftel
+        # zu extrahieren spart den Grossteil der Suchkosten pro Seite.
+        header_region = page.crop((0, 0, page.width, page.height * 0.2))
+        header_text = header_region.extract_text() or ""
+        if SUSA_HEADER_RE.search(header_text):
             matches.append(index)
+        # Seiten-Cache sofort freigeben, sonst waechst der RAM mit der Seitenzahl.
+        page.flush_cache()
     if not matches:
         return None, None
     return matches[0], matches[-1]
@@ -95,7 +151,9 @@ def find_susa_page_range(pdf):
 
 def parse_pdf(pdf_path: Path, start_page: int | None = None, end_page: int | None = None):
     konto_re = re.compile(r"^\d{3,4}\s*\d{2}$")
-    rows = []
+    # Spaltenweise Listen (SoA) statt eines Dicts pro Zeile; spart die
+    # Dict-Allokation pro Konto und passt direkt auf DataFrame(cols).
+    cols = {name: [] for name, _, _ in COLUMN_BOUNDS}
     with pdfplumber.open(pdf_path) as pdf:
         total_pages = len(pdf.pages)
         if start_page is None and end_page is None:
@@ -120,46 +178,35 @@ def parse_pdf(pdf_path: Path, start_page: int | None = None, end_page: int | Non
 
         for page in pdf.pages[start_idx:end_idx]:
             for _, line_chars in collect_lines(page):
-                cols = slice_columns(line_chars)
-                konto = cols["Konto"].strip()
+                line_cols = slice_columns(line_chars)
+                konto = line_cols["Konto"].strip()
                 if not konto_re.match(konto):
                     continue
-                rows.append(
-                    {
-                        "Konto": konto,
-                        "Beschriftung": cols["Beschriftung"],
-                        "EB-Wert": parse_amount(cols["EB-Wert"], signed=True),
-                        "Monat Soll": parse_amount(cols["Monat Soll"]),
-                        "Monat Haben": parse_amount(cols["Monat Haben"]),
-                        "Kum Werte Soll": parse_amount(cols["Kum Werte Soll"]),
-                        "Kum Werte Haben": parse_amount(cols["Kum Werte Haben"]),
-                        "Saldo": parse_amount(cols["Saldo"], signed=True),
-                    }
-                )
-    return rows
-
-
-def write_csv(rows, out_path: Path):
+                cols["Konto"].append(konto)
+                cols["Beschriftung"].append(line_cols["Beschriftung"])
+                cols["EB-Wert"].append(parse_amount(line_cols["EB-Wert"], signed=True))
+                cols["Monat Soll"].append(parse_amount(line_cols["Monat Soll"]))
+                cols["Monat Haben"].append(parse_amount(line_cols["Monat Haben"]))
+                cols["Kum Werte Soll"].append(parse_amount(line_cols["Kum Werte Soll"]))
+                cols["Kum Werte Haben"].append(parse_amount(line_cols["Kum Werte Haben"]))
+                cols["Saldo"].append(parse_amount(line_cols["Saldo"], signed=True))
+            # Seiten-Cache sofort freigeben, sonst waechst der RAM mit der Seitenzahl.
+            page.flush_cache()
+    return cols
+
+
+def write_csv(cols, out_path: Path):
     out_path.parent.mkdir(parents=True, exist_ok=True)
     fieldnames = [name for name, _, _ in COLUMN_BOUNDS]
+    fmt = lambda v: format(v, ".2f").translate(_DOT_TO_COMMA)
+    # Die DATEV-Felder sind kontrolliert (keine Semikolons, kein Quoting
+    # noetig), daher reicht ein str.join pro Zeile statt csv.writer pro Feld.
+    lines = [";".join(fieldnames)]
+    for konto, beschriftung, *amounts in zip(*(cols[name] for name in fieldnames)):
+        lines.append(";".join((konto, beschriftung, *map(fmt, amounts))))
     # Use UTF-8 with BOM so Excel (deutsche Lokalisierung) oeffnet Umlaute korrekt.
-    with out_path.open("w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
-        writer.writeheader()
-        fmt = lambda v: f"{v:.2f}".replace(".", ",")
-        for row in rows:
-            writer.writerow(
-                {
-                    "Konto": row["Konto"],
-                    "Beschriftung": row["Beschriftung"],
-                    "EB-Wert": fmt(row["EB-Wert"]),
-                    "Monat Soll": fmt(row["Monat Soll"]),
-                    "Monat Haben": fmt(row["Monat Haben"]),
-                    "Kum Werte Soll": fmt(row["Kum Werte Soll"]),
-                    "Kum Werte Haben": fmt(row["Kum Werte Haben"]),
-                    "Saldo": fmt(row["Saldo"]),
-                }
-            )
+    with out_path.open("wb") as f:
+        f.write(("\r\n".join(lines) + "\r\n").encode("utf-8-sig"))
 
 
 def format_excel_sheet(ws, columns, numeric_columns, text_columns):
@@ -199,31 +246,98 @@ def format_excel_sheet(ws, columns, numeric_columns, text_columns):
         ws.column_dimensions[get_column_letter(col_idx)].width = width
 
 
-def write_excel(rows, out_path: Path):
+def write_excel_stream(columns, data_rows, numeric_columns, text_columns, out_path: Path):
+    import xlsxwriter
+
+    # constant_memory streamt jede Zeile direkt auf die Platte (O(1) RAM),
+    # daher werden die Spaltenbreiten vorab aus den Daten bestimmt.
+    widths = [len(str(col)) for col in columns]
+    for row in data_rows:
+        for idx, value in enumerate(row):
+            if isinstance(value, (int, float)):
+                display = f"{value:,.2f}"
+            else:
+                display = "" if value is None else str(value)
+            if display and len(display) > widths[idx]:
+                widths[idx] = len(display)
+
+    wb = xlsxwriter.Workbook(str(out_path), {"constant_memory": True})
     try:
-        import pandas as pd
-    except ImportError as exc:
-        raise RuntimeError("Pandas ist nicht installiert. Excel-Ausgabe nicht moeglich.") from exc
+        ws = wb.add_worksheet("Daten")
+        header_format = wb.add_format(
+            {
+                "bold": True,
+                "bg_color": f"#{HEADER_FILL}",
+                "align": "center",
+                "valign": "vcenter",
+                "text_wrap": True,
+            }
+        )
+        number_format = wb.add_format({"num_format": "#,##0.00", "align": "right"})
+        text_format = wb.add_format({"align": "left"})
+        for col_idx, col_name in enumerate(columns):
+            max_width = 60 if col_name in text_columns else 24
+            width = min(widths[col_idx] + 2, max_width)
+            width = max(width, 8)
+            ws.set_column(col_idx, col_idx, width)
+        ws.write_row(0, 0, columns, header_format)
+        for row_idx, row in enumerate(data_rows, start=1):
+            for col_idx, value in enumerate(row):
+                if columns[col_idx] in numeric_columns and isinstance(value, (int, float)):
+                    ws.write_number(row_idx, col_idx, value, number_format)
+                else:
+                    ws.write(row_idx, col_idx, "" if value is None else value, text_format)
+        ws.freeze_panes(1, 0)
+        ws.autofilter(0, 0, len(data_rows), len(columns) - 1)
+    finally:
+        wb.close()
+
+
+def write_excel(cols, out_path: Path):
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fieldnames = [name for name, _, _ in COLUMN_BOUNDS]
+    numeric_columns = fieldnames[2:]
+    text_columns = {fieldnames[1]}
+
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        xlsxwriter = None
+
+    if xlsxwriter is not None:
+        data_rows = list(zip(*(cols[name] for name in fieldnames)))
+        try:
+            write_excel_stream(fieldnames, data_rows, numeric_columns, text_columns, out_path)
+        except Exception as exc:
+            raise RuntimeError(f"Excel-Ausgabe fehlgeschlagen: {exc}") from exc
+        return
+
+    # Fallback ohne xlsxwriter: pandas + openpyxl (puffert das ganze Blatt).
+    if pd is None:
+        raise RuntimeError("Pandas ist nicht installiert. Excel-Ausgabe nicht moeglich.")
 
     try:
         import openpyxl  # noqa: F401
     except ImportError as exc:
         raise RuntimeError("openpyxl ist nicht installiert. Excel-Ausgabe nicht moeglich.") from exc
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = [name for name, _, _ in COLUMN_BOUNDS]
-    df = pd.DataFrame(rows, columns=fieldnames)
+    # dict[str, list] ist fuer pandas bereits spaltenweise; keine Konvertierung.
+    df = pd.DataFrame(cols, columns=fieldnames)
     try:
         with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
             df.to_excel(writer, index=False, sheet_name="Daten")
             ws = writer.sheets["Daten"]
-            numeric_columns = fieldnames[2:]
-            text_columns = {fieldnames[1]}
             format_excel_sheet(ws, fieldnames, numeric_columns, text_columns)
     except Exception as exc:
         raise RuntimeError(f"Excel-Ausgabe fehlgeschlagen: {exc}") from exc
 
 
+def content_fingerprint(pdf_path: Path) -> str:
+    # BLAKE2b liest mit ~1 GB/s; deutlich billiger, als die PDF neu zu parsen.
+    digest = hashlib.blake2b(pdf_path.read_bytes(), digest_size=16).hexdigest()
+    return f"{CACHE_VERSION}:{digest}"
+
+
 def build_output_paths(out_dir: Path, pdf_path: Path, excel_dir: Path | None, write_excel_file: bool):
     csv_path = out_dir / f"{pdf_path.stem}_susa.csv"
     excel_path = None
@@ -233,6 +347,32 @@ def build_output_paths(out_dir: Path, pdf_path: Path, excel_dir: Path | None, wr
     return csv_path, excel_path
 
 
+def _init_worker():
+    # Laedt die Excel-Abhaengigkeiten einmal pro Worker-Prozess vor, damit
+    # der Importpreis nicht erst beim ersten konvertierten PDF anfaellt.
+    for module in ("xlsxwriter", "openpyxl"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _process_one(
+    pdf_path: Path,
+    csv_path: Path,
+    excel_path: Path | None,
+    start_page: int | None,
+    end_page: int | None,
+    write_excel_file: bool,
+):
+    # Top-level Worker, damit ProcessPoolExecutor ihn picklen kann.
+    cols = parse_pdf(pdf_path, start_page=start_page, end_page=end_page)
+    write_csv(cols, csv_path)
+    if write_excel_file and excel_path is not None:
+        write_excel(cols, excel_path)
+    return csv_path
+
+
 def convert_batch(
     input_dir: Path,
     out_dir: Path,
@@ -251,23 +391,57 @@ def convert_batch(
 
     written = []
     skipped = []
+    jobs = []
     for pdf_path in pdf_paths:
         csv_path, excel_path = build_output_paths(out_dir, pdf_path, excel_dir, write_excel_file)
-        if csv_path.exists() and (not write_excel_file or (excel_path and excel_path.exists())):
-            safe_print(f"INFO: Uebersprungen (bereits vorhanden): {csv_path}")
-            continue
+        hash_path = csv_path.with_name(csv_path.name + ".hash")
         try:
-            rows = parse_pdf(pdf_path, start_page=start_page, end_page=end_page)
-            write_csv(rows, csv_path)
-            if write_excel_file and excel_path is not None:
-                write_excel(rows, excel_path)
-            written.append(csv_path)
-            safe_print(f"Geschrieben: {csv_path}")
-            if write_excel_file and excel_path is not None:
-                safe_print(f"Geschrieben: {excel_path}")
+            fingerprint = content_fingerprint(pdf_path)
+            outputs_exist = csv_path.exists() and (
+                not write_excel_file or (excel_path and excel_path.exists())
+            )
+            if outputs_exist:
+                # Ohne Sidecar wird wie bisher uebersprungen; bei abweichendem
+                # Inhalts-Hash wird die PDF neu konvertiert.
+                stored = (
+                    hash_path.read_text(encoding="ascii").strip() if hash_path.exists() else None
+                )
+                if stored is None or stored == fingerprint:
+                    safe_print(f"INFO: Uebersprungen (bereits vorhanden): {csv_path}")
+                    continue
         except Exception as exc:
+            # Fehler pro Datei isolieren, damit der Batch weiterlaeuft.
             skipped.append((pdf_path, str(exc)))
             safe_print(f"Uebersprungen: {pdf_path} ({exc})")
+            continue
+        jobs.append((pdf_path, csv_path, excel_path, fingerprint, hash_path))
+
+    # Jede PDF ist ein unabhaengiger CPU-Job; Prozesse skalieren nahezu linear.
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(
+                _process_one,
+                pdf_path,
+                csv_path,
+                excel_path,
+                start_page,
+                end_page,
+                write_excel_file,
+            ): (pdf_path, csv_path, excel_path, fingerprint, hash_path)
+            for pdf_path, csv_path, excel_path, fingerprint, hash_path in jobs
+        }
+        for future in as_completed(futures):
+            pdf_path, csv_path, excel_path, fingerprint, hash_path = futures[future]
+            try:
+                future.result()
+                hash_path.write_text(fingerprint, encoding="ascii")
+                written.append(csv_path)
+                safe_print(f"Geschrieben: {csv_path}")
+                if write_excel_file and excel_path is not None:
+                    safe_print(f"Geschrieben: {excel_path}")
+            except Exception as exc:
+                skipped.append((pdf_path, str(exc)))
+                safe_print(f"Uebersprungen: {pdf_path} ({exc})")
     return written, skipped
 
 
@@ -358,13 +532,14 @@ def main():
     if not pdf_path.exists():
         parser.error(f"PDF nicht gefunden: {pdf_path}")
 
-    rows = parse_pdf(pdf_path, start_page=args.start_page, end_page=args.end_page)
-    write_csv(rows, args.out)
-    safe_print(f"Geschrieben: {args.out} ({len(rows)} Zeilen)")
+    cols = parse_pdf(pdf_path, start_page=args.start_page, end_page=args.end_page)
+    row_count = len(cols["Konto"])
+    write_csv(cols, args.out)
+    safe_print(f"Geschrieben: {args.out} ({row_count} Zeilen)")
     if write_excel_file:
         excel_path = args.excel or args.out.with_suffix(".xlsx")
-        write_excel(rows, excel_path)
-        safe_print(f"Geschrieben: {excel_path} ({len(rows)} Zeilen)")
+        write_excel(cols, excel_path)
+        safe_print(f"Geschrieben: {excel_path} ({row_count} Zeilen)")
 
 
 if __name__ == "__main__":